@@ -9,16 +9,98 @@ license: MIT
 """
 
 import os
+import asyncio
+import logging
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import json
-import time
-import uuid
-from typing import List, Union, Generator, Iterator, Any, Optional
+from uuid import uuid4
+from typing import List, Union, AsyncGenerator, Any, Optional
 from pydantic import BaseModel, Field
 from open_webui.utils.misc import pop_system_message
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional, fall back to the stdlib
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+log = logging.getLogger(__name__)
+
+# Queued by the SSE producer once the event stream is exhausted
+_STREAM_END = object()
+
+# Shared async client so streaming requests reuse pooled connections
+_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(60.0, connect=3.05),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+)
+
+
+async def _aiter_sse_lines(response: httpx.Response) -> AsyncGenerator[bytes, None]:
+    """Split a raw SSE byte stream into lines as soon as each chunk is received"""
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        # Only the new bytes can contain a newline not seen before
+        start = len(buffer)
+        buffer += chunk
+        end = buffer.rfind(b"\n", start)
+        if end < 0:
+            continue
+        lines = bytes(buffer[:end]).split(b"\n")
+        # Keep the trailing partial line for the next chunk
+        del buffer[:end + 1]
+        for line in lines:
+            yield line
+    if buffer:
+        yield bytes(buffer)
+
+
+def _context_metadata(
+    original_model: Any,
+    requested_model: Any,
+    user_preferences: Any,
+    temperature: Any,
+    max_tokens: Any,
+    stream: Any,
+) -> dict:
+    """OpenWebUI request metadata forwarded as the AG-UI context value"""
+    return {
+        "original_model": original_model,
+        "requested_model": requested_model,
+        "user_preferences": user_preferences,
+        "source": "openwebui_pipe",
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": stream
+    }
+
 
 class Pipe:
+    # SSE data line prefix, e.g. b'data: {"type": "RUN_STARTED", ...}'
+    _DATA_PREFIX = b"data: "
+    _DATA_PREFIX_LEN = len(_DATA_PREFIX)
+    # Events after which the AG-UI stream is considered complete
+    _TERMINAL_EVENTS = frozenset({"RUN_FINISHED", "RUN_ERROR"})
+    # Queued text deltas are coalesced into chunks of up to this many characters
+    _TEXT_FLUSH_SIZE = 256
+    # Parsed events buffered ahead of the consumer before reading pauses
+    _EVENT_QUEUE_SIZE = 64
+    # OpenWebUI-safe model IDs -> actual model names, built once at import
+    _MODEL_MAPPING = {
+        "agui-agent": "agui-agent"
+    }
+    _AG_UI_MODELS = [
+        {"id": "agui-agent", "name": "agui-agent"},
+    ]
+
     class Valves(BaseModel):
         AG_UI_ENDPOINT_URL: str = Field(
             default="http://host.docker.internal:8000", 
@@ -32,6 +114,10 @@ class Pipe:
             default="agui-agent", 
             description="Default model ID to request from AG-UI endpoint"
         )
+        EMBED_CONTEXT_AS_STRING: bool = Field(
+            default=True,
+            description="Send context metadata as a JSON string (AG-UI schema) instead of a nested object"
+        )
 
 
     def __init__(self):
@@ -42,64 +128,91 @@ class Pipe:
             **{
                 "AG_UI_ENDPOINT_URL": os.getenv("AG_UI_ENDPOINT_URL", "http://host.docker.internal:8000"),
                 "THREAD_ID_PREFIX": os.getenv("THREAD_ID_PREFIX", "openwebui"),
-                "DEFAULT_MODEL": os.getenv("DEFAULT_MODEL", "agui-agent")
+                "DEFAULT_MODEL": os.getenv("DEFAULT_MODEL", "agui-agent"),
+                "EMBED_CONTEXT_AS_STRING": os.getenv("EMBED_CONTEXT_AS_STRING", "true")
             }
         )
+        
+        # Reuse connections to the AG-UI endpoint across requests
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # AG-UI event type -> handler returning the text to show (if any)
+        self._handlers = {
+            "TEXT_MESSAGE_CONTENT": self._handle_text_content,
+            "TEXT_MESSAGE_START": self._handle_text_start,
+            "TEXT_MESSAGE_END": self._handle_text_end,
+            "RUN_STARTED": self._handle_run_started,
+            "RUN_FINISHED": self._handle_run_finished,
+            "RUN_ERROR": self._handle_run_error,
+            "TOOL_CALL_START": self._handle_tool_start,
+            "TOOL_CALL_ARGS": self._handle_tool_args,
+            "TOOL_CALL_END": self._handle_tool_end,
+            "TOOL_CALL_RESULT": self._handle_tool_result,
+        }
+
+    def __del__(self):
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
 
     def get_model_mapping(self):
         """Map OpenWebUI-safe model IDs to actual model names"""
-        return {
-            "agui-agent": "agui-agent"
-        }
+        return self._MODEL_MAPPING
 
     def get_ag_ui_models(self):
         """Return available models - these will be passed through to the AG-UI endpoint"""
-        return [
-            {"id": "agui-agent", "name": "agui-agent"},
-        ]
+        return self._AG_UI_MODELS
 
     def pipes(self) -> List[dict]:
         return self.get_ag_ui_models()
 
     def transform_openwebui_to_ag_ui(self, body: dict) -> dict:
         """Transform OpenWebUI request to AG-UI RunAgentInput format"""
-        system_message, messages = pop_system_message(body.get("messages", []))
+        msgs = body.get("messages") or []
+        if msgs and msgs[0].get("role") == "system":
+            # Fast path: OpenWebUI sends the system prompt first. The slice still
+            # copies the history, but skips pop_system_message's Python-level
+            # filter pass. Later system messages are forwarded as-is here, while
+            # the fallback below drops every system message after the first.
+            system_message, messages = msgs[0], msgs[1:]
+        else:
+            system_message, messages = pop_system_message(msgs)
         
         # Generate unique identifiers
-        thread_id = f"{self.valves.THREAD_ID_PREFIX}_{uuid.uuid4()}"
-        run_id = f"run_{uuid.uuid4()}"
+        thread_id = f"{self.valves.THREAD_ID_PREFIX}_{uuid4().hex}"
+        run_id = "run_" + uuid4().hex
         
-        # Transform messages to AG-UI format
+        # System message first if present, then regular messages in AG-UI format
+        new_id = uuid4
         ag_ui_messages = []
-        
-        # Add system message if present
         if system_message:
             ag_ui_messages.append({
-                "id": f"msg_{uuid.uuid4()}",
+                "id": "msg_" + new_id().hex,
                 "role": "system",
-                "content": str(system_message)
+                "content": system_message.get("content", "")
             })
-        
-        # Transform regular messages
-        for msg in messages:
-            ag_ui_msg = {
-                "id": f"msg_{uuid.uuid4()}",
+        ag_ui_messages.extend([
+            {
+                "id": "msg_" + new_id().hex,
                 "role": msg.get("role", "user"),
                 "content": msg.get("content", "")
             }
-            ag_ui_messages.append(ag_ui_msg)
+            for msg in messages
+        ])
         
         # Extract model from the request (remove pipe prefix if present)
+        model_mapping = self._MODEL_MAPPING
         requested_model = body.get("model", self.valves.DEFAULT_MODEL)
         if requested_model and "." in requested_model:
             # Remove pipe prefix (e.g., "aguimiddleware.agui-agent" -> "agui-agent")
             model_id = requested_model.split(".", 1)[1]
             # Map to actual model name
-            model_mapping = self.get_model_mapping()
             requested_model = model_mapping.get(model_id, self.valves.DEFAULT_MODEL)
         else:
             # If no prefix, try to map directly
-            model_mapping = self.get_model_mapping()
             requested_model = model_mapping.get(requested_model, requested_model)
         
         # Build AG-UI RunAgentInput
@@ -112,15 +225,7 @@ class Pipe:
             "context": [
                 {
                     "description": "OpenWebUI request metadata",
-                    "value": json.dumps({
-                        "original_model": body.get("model"),
-                        "requested_model": requested_model,
-                        "user_preferences": body.get("user", {}),
-                        "source": "openwebui_pipe",
-                        "temperature": body.get("temperature"),
-                        "max_tokens": body.get("max_tokens"),
-                        "stream": body.get("stream", True)
-                    })
+                    "value": self._context_value(body, requested_model)
                 }
             ],
             "forwardedProps": {
@@ -139,152 +244,226 @@ class Pipe:
         
         return ag_ui_request
 
-    def pipe(self, body: dict) -> Union[str, Generator, Iterator]:
+    def _context_value(self, body: dict, requested_model: Any) -> Union[str, dict]:
+        """Return the context metadata, as a JSON string when EMBED_CONTEXT_AS_STRING is set"""
+        metadata = _context_metadata(
+            original_model=body.get("model"),
+            requested_model=requested_model,
+            user_preferences=body.get("user", {}),
+            temperature=body.get("temperature"),
+            max_tokens=body.get("max_tokens"),
+            stream=body.get("stream", True),
+        )
+        if not self.valves.EMBED_CONTEXT_AS_STRING:
+            # Nested object, so the endpoint doesn't have to decode it a second time
+            return metadata
+        return _json_dumps(metadata).decode()
+
+    async def pipe(self, body: dict) -> Union[str, AsyncGenerator[str, None]]:
         """Main pipe method - transforms OpenWebUI request to AG-UI and back"""
         try:
             # Transform OpenWebUI request to AG-UI format
             ag_ui_request = self.transform_openwebui_to_ag_ui(body)
             
-            print(f"🔄 Forwarding to AG-UI endpoint: {self.valves.AG_UI_ENDPOINT_URL}")
-            print(f"📋 Request: threadId={ag_ui_request['threadId']}, runId={ag_ui_request['runId']}")
-            print(f"🤖 Model: {ag_ui_request['forwardedProps']['model']}")
-            print(f"💬 Messages: {len(ag_ui_request['messages'])}")
-            print(f"📝 Context: {len(ag_ui_request['context'])} items")
-            print(f"🔧 State: {{}} (empty object - required field)")
-            print(f"🔧 Tool calls will be shown to user")
-            if ag_ui_request['context']:
-                print(f"📋 Context value type: {type(ag_ui_request['context'][0]['value'])}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("🔄 Forwarding to AG-UI endpoint: %s", self.valves.AG_UI_ENDPOINT_URL)
+                log.debug("📋 Request: threadId=%s, runId=%s", ag_ui_request['threadId'], ag_ui_request['runId'])
+                log.debug("🤖 Model: %s", ag_ui_request['forwardedProps']['model'])
+                log.debug("💬 Messages: %d", len(ag_ui_request['messages']))
+                log.debug("📝 Context: %d items", len(ag_ui_request['context']))
+                log.debug("🔧 State: {} (empty object - required field)")
+                log.debug("🔧 Tool calls will be shown to user")
+                if ag_ui_request['context']:
+                    log.debug("📋 Context value type: %s", type(ag_ui_request['context'][0]['value']))
             
             # Forward to AG-UI endpoint and transform response back
             if body.get("stream", True):
                 return self.stream_ag_ui_request(ag_ui_request)
             else:
-                return self.non_stream_ag_ui_request(ag_ui_request)
+                # Keep the blocking requests call off the event loop
+                return await asyncio.to_thread(self.non_stream_ag_ui_request, ag_ui_request)
                 
         except Exception as e:
-            print(f"❌ Error in pipe method: {e}")
+            log.error("❌ Error in pipe method: %s", e)
             return f"Error: {e}"
 
-    def stream_ag_ui_request(self, ag_ui_request: dict) -> Generator:
+    def _format_error(self, status_code: int, body: bytes) -> str:
+        """Turn an AG-UI endpoint error response into a user-facing message"""
+        error_text = body.decode("utf-8", errors="replace")
+        log.error("❌ AG-UI endpoint error %s: %s", status_code, error_text)
+        
+        # Try to parse validation errors for better user feedback
+        if status_code == 422:
+            try:
+                error_data = _json_loads(body)
+            except json.JSONDecodeError:
+                error_data = None
+            if isinstance(error_data, list):
+                validation_errors = []
+                for error in error_data:
+                    field = ".".join(str(loc) for loc in error.get("loc", []))
+                    msg = error.get("msg", "Unknown error")
+                    validation_errors.append(f"{field}: {msg}")
+                return f"Validation Error: {'; '.join(validation_errors)}"
+        
+        return f"Error: AG-UI endpoint returned {status_code}: {error_text}"
+
+    def _handle_text_content(self, event_data: dict) -> Optional[str]:
+        # Extract delta text and yield as OpenWebUI expects
+        return event_data.get("delta", "")
+
+    def _handle_text_start(self, event_data: dict) -> Optional[str]:
+        log.debug("📝 Message started: %s", event_data.get("messageId", "unknown"))
+
+    def _handle_text_end(self, event_data: dict) -> Optional[str]:
+        log.debug("✅ Message ended: %s", event_data.get("messageId", "unknown"))
+
+    def _handle_run_started(self, event_data: dict) -> Optional[str]:
+        log.debug("🚀 Run started: %s", event_data.get("runId", "unknown"))
+
+    def _handle_run_finished(self, event_data: dict) -> Optional[str]:
+        log.debug("🏁 Run finished: %s", event_data.get("runId", "unknown"))
+
+    def _handle_run_error(self, event_data: dict) -> Optional[str]:
+        error_msg = event_data.get("message", "Unknown error")
+        log.error("❌ AG-UI error: %s", error_msg)
+        return f"Error from AG-UI endpoint: {error_msg}"
+
+    def _handle_tool_start(self, event_data: dict) -> Optional[str]:
+        tool_name = event_data.get("toolCallName", "unknown")
+        log.debug("🔧 Tool call started: %s", tool_name)
+        # Show tool call start to user (similar to OpenWebUI format)
+        return f"\n**🔧 Calling tool: `{tool_name}`**\n"
+
+    def _handle_tool_args(self, event_data: dict) -> Optional[str]:
+        # Show tool arguments being built (streaming)
+        return event_data.get("delta", "")
+
+    def _handle_tool_end(self, event_data: dict) -> Optional[str]:
+        log.debug("🔧 Tool call completed")
+        # Add line break after tool arguments
+        return "\n"
+
+    def _handle_tool_result(self, event_data: dict) -> Optional[str]:
+        tool_result = event_data.get("content", "")
+        log.debug("🔍 Tool result: %s", tool_result)
+        if tool_result:
+            # Show tool result to user (similar to OpenWebUI format)
+            return f"**📋 Tool result:**\n```\n{tool_result}\n```\n\n"
+
+    async def _produce_events(self, response: httpx.Response, queue: asyncio.Queue) -> None:
+        """Parse SSE events from the response into the queue, ending with _STREAM_END"""
+        # Lines stay as bytes; a trailing \r from CRLF endings is JSON
+        # whitespace, so orjson parses the payload without stripping it
+        prefix = self._DATA_PREFIX
+        prefix_len = self._DATA_PREFIX_LEN
+        try:
+            async for line in _aiter_sse_lines(response):
+                if line[:prefix_len] == prefix:
+                    try:
+                        event_data = _json_loads(line[prefix_len:])
+                    except json.JSONDecodeError as e:
+                        log.warning("⚠️  Failed to parse AG-UI event: %s - %s", line, e)
+                        continue
+                    await queue.put(event_data)
+        except Exception as e:
+            # Hand read errors to the consumer, which reports them
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
+
+    async def stream_ag_ui_request(self, ag_ui_request: dict) -> AsyncGenerator[str, None]:
         """Forward AG-UI request to endpoint and transform streaming response back to OpenWebUI format"""
+        text_buffer: List[str] = []
+        error_chunk = None
         try:
             headers = {
                 "Content-Type": "application/json",
                 "Accept": "text/event-stream"
             }
             
-            # Forward request to AG-UI endpoint
-            with requests.post(
+            # Forward request to AG-UI endpoint, encoded once up front
+            async with _client.stream(
+                "POST",
                 self.valves.AG_UI_ENDPOINT_URL,
-                json=ag_ui_request,
-                headers=headers,
-                stream=True,
-                timeout=(3.05, 60)
+                content=_json_dumps(ag_ui_request),
+                headers=headers
             ) as response:
                 if response.status_code != 200:
-                    error_text = response.text
-                    print(f"❌ AG-UI endpoint error {response.status_code}: {error_text}")
-                    
-                    # Try to parse validation errors for better user feedback
-                    if response.status_code == 422:
-                        try:
-                            error_data = json.loads(error_text)
-                            if isinstance(error_data, list):
-                                validation_errors = []
-                                for error in error_data:
-                                    field = ".".join(str(loc) for loc in error.get("loc", []))
-                                    msg = error.get("msg", "Unknown error")
-                                    validation_errors.append(f"{field}: {msg}")
-                                yield f"Validation Error: {'; '.join(validation_errors)}"
-                                return
-                        except json.JSONDecodeError:
-                            pass
-                    
-                    yield f"Error: AG-UI endpoint returned {response.status_code}: {error_text}"
+                    yield self._format_error(response.status_code, await response.aread())
                     return
                 
-                print("✅ Connected to AG-UI endpoint, processing events...")
+                log.debug("✅ Connected to AG-UI endpoint, processing events...")
                 
-                # Process AG-UI event stream and convert to OpenWebUI format
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode("utf-8")
-                        if line.startswith("data: "):
-                            try:
-                                event_data = json.loads(line[6:])
-                                event_type = event_data.get("type", "")
-                                
-                                # Transform AG-UI events to OpenWebUI text chunks
-                                if event_type == "TEXT_MESSAGE_CONTENT":
-                                    # Extract delta text and yield as OpenWebUI expects
-                                    delta = event_data.get("delta", "")
-                                    if delta:
-                                        yield delta
-                                
-                                elif event_type == "TEXT_MESSAGE_START":
-                                    print(f"📝 Message started: {event_data.get('messageId', 'unknown')}")
-                                
-                                elif event_type == "TEXT_MESSAGE_END":
-                                    print(f"✅ Message ended: {event_data.get('messageId', 'unknown')}")
-                                
-                                elif event_type == "RUN_STARTED":
-                                    print(f"🚀 Run started: {event_data.get('runId', 'unknown')}")
-                                
-                                elif event_type == "RUN_FINISHED":
-                                    print(f"🏁 Run finished: {event_data.get('runId', 'unknown')}")
-                                    break
-                                
-                                elif event_type == "RUN_ERROR":
-                                    error_msg = event_data.get("message", "Unknown error")
-                                    print(f"❌ AG-UI error: {error_msg}")
-                                    yield f"Error from AG-UI endpoint: {error_msg}"
-                                    break
-                                
-                                elif event_type == "TOOL_CALL_START":
-                                    tool_name = event_data.get("toolCallName", "unknown")
-                                    tool_id = event_data.get("toolCallId", "unknown")
-                                    print(f"🔧 Tool call started: {tool_name}")
-                                    # Show tool call start to user (similar to OpenWebUI format)
-                                    yield f"\n**🔧 Calling tool: `{tool_name}`**\n"
-                                
-                                elif event_type == "TOOL_CALL_ARGS":
-                                    # Show tool arguments being built (streaming)
-                                    args_delta = event_data.get("delta", "")
-                                    if args_delta:
-                                        yield args_delta
-                                
-                                elif event_type == "TOOL_CALL_END":
-                                    print(f"🔧 Tool call completed")
-                                    # Add line break after tool arguments
-                                    yield "\n"
-                                
-                                elif event_type == "TOOL_CALL_RESULT":
-                                    tool_result = event_data.get("content", "")
-                                    print(f"🔍 Tool result: {tool_result}")
-                                    if tool_result:
-                                        # Show tool result to user (similar to OpenWebUI format)
-                                        yield f"**📋 Tool result:**\n```\n{tool_result}\n```\n\n"
-                                
-                                # Add small delay to avoid overwhelming
-                                time.sleep(0.01)
-                                
-                            except json.JSONDecodeError as e:
-                                print(f"⚠️  Failed to parse AG-UI event: {line} - {e}")
-                                continue
-                            except KeyError as e:
-                                print(f"⚠️  Unexpected AG-UI event structure: {e}")
+                # Process AG-UI event stream and convert to OpenWebUI format.
+                # A producer task reads and parses events into a bounded queue,
+                # so the socket is drained while we format output and a slow
+                # client naturally pauses reading once the queue is full.
+                queue: asyncio.Queue = asyncio.Queue(maxsize=self._EVENT_QUEUE_SIZE)
+                producer = asyncio.create_task(self._produce_events(response, queue))
+                handlers = self._handlers
+                terminal_events = self._TERMINAL_EVENTS
+                flush_size = self._TEXT_FLUSH_SIZE
+                buffered_len = 0
+                try:
+                    while True:
+                        event_data = await queue.get()
+                        if event_data is _STREAM_END:
+                            break
+                        if isinstance(event_data, BaseException):
+                            raise event_data
+                        try:
+                            event_type = event_data.get("type", "")
+                            
+                            # Transform AG-UI events to OpenWebUI text chunks
+                            handler = handlers.get(event_type)
+                            chunk = handler(event_data) if handler is not None else None
+                            
+                            if event_type == "TEXT_MESSAGE_CONTENT":
+                                # Coalesce deltas that are already queued, but never
+                                # hold text back waiting for the network
+                                if chunk:
+                                    text_buffer.append(chunk)
+                                    buffered_len += len(chunk)
+                                if text_buffer and (buffered_len >= flush_size or queue.empty()):
+                                    yield "".join(text_buffer)
+                                    text_buffer.clear()
+                                    buffered_len = 0
                                 continue
+                            
+                            # Flush pending text before any other output
+                            if text_buffer:
+                                yield "".join(text_buffer)
+                                text_buffer.clear()
+                                buffered_len = 0
+                            if chunk:
+                                yield chunk
+                            if event_type in terminal_events:
+                                break
+                            
+                        except KeyError as e:
+                            log.warning("⚠️  Unexpected AG-UI event structure: %s", e)
+                            continue
+                finally:
+                    producer.cancel()
+                    await asyncio.gather(producer, return_exceptions=True)
         
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             error_msg = f"Failed to connect to AG-UI endpoint at {self.valves.AG_UI_ENDPOINT_URL}"
-            print(f"❌ {error_msg}")
-            yield f"Error: {error_msg}. Please check if the AG-UI endpoint is running."
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request to AG-UI endpoint failed: {e}")
-            yield f"Error: Failed to connect to AG-UI endpoint: {e}"
+            log.error("❌ %s", error_msg)
+            error_chunk = f"Error: {error_msg}. Please check if the AG-UI endpoint is running."
+        except httpx.HTTPError as e:
+            log.error("❌ Request to AG-UI endpoint failed: %s", e)
+            error_chunk = f"Error: Failed to connect to AG-UI endpoint: {e}"
         except Exception as e:
-            print(f"❌ Error in AG-UI streaming: {e}")
-            yield f"Error: {e}"
+            log.error("❌ Error in AG-UI streaming: %s", e)
+            error_chunk = f"Error: {e}"
+        
+        # Deliver any text still buffered when the stream ended or failed
+        if text_buffer:
+            yield "".join(text_buffer)
+        if error_chunk:
+            yield error_chunk
 
     def non_stream_ag_ui_request(self, ag_ui_request: dict) -> str:
         """Forward AG-UI request to endpoint and return non-streaming response"""
@@ -297,35 +476,18 @@ class Pipe:
             # Set non-streaming in the request
             ag_ui_request["state"]["stream"] = False
             
-            response = requests.post(
+            response = self._session.post(
                 self.valves.AG_UI_ENDPOINT_URL,
-                json=ag_ui_request,
+                data=_json_dumps(ag_ui_request),
                 headers=headers,
                 timeout=(3.05, 60)
             )
             
             if response.status_code != 200:
-                error_text = response.text
-                print(f"❌ AG-UI endpoint error {response.status_code}: {error_text}")
-                
-                # Try to parse validation errors for better user feedback
-                if response.status_code == 422:
-                    try:
-                        error_data = json.loads(error_text)
-                        if isinstance(error_data, list):
-                            validation_errors = []
-                            for error in error_data:
-                                field = ".".join(str(loc) for loc in error.get("loc", []))
-                                msg = error.get("msg", "Unknown error")
-                                validation_errors.append(f"{field}: {msg}")
-                            return f"Validation Error: {'; '.join(validation_errors)}"
-                    except json.JSONDecodeError:
-                        pass
-                
-                return f"Error: AG-UI endpoint returned {response.status_code}: {error_text}"
+                return self._format_error(response.status_code, response.content)
             
             # Parse response and extract text content
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Extract text from AG-UI response format
             # This depends on how your AG-UI endpoint returns non-streaming responses
@@ -346,11 +508,11 @@ class Pipe:
                 
         except requests.exceptions.ConnectionError:
             error_msg = f"Failed to connect to AG-UI endpoint at {self.valves.AG_UI_ENDPOINT_URL}"
-            print(f"❌ {error_msg}")
+            log.error("❌ %s", error_msg)
             return f"Error: {error_msg}. Please check if the AG-UI endpoint is running."
         except requests.exceptions.RequestException as e:
-            print(f"❌ Request to AG-UI endpoint failed: {e}")
+            log.error("❌ Request to AG-UI endpoint failed: %s", e)
             return f"Error: Failed to connect to AG-UI endpoint: {e}"
         except Exception as e:
-            print(f"❌ Error in non-streaming AG-UI request: {e}")
+            log.error("❌ Error in non-streaming AG-UI request: %s", e)
             return f"Error: {e}"
\ No newline at end of file
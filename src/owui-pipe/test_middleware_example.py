@@ -4,6 +4,7 @@ Test example demonstrating AG-UI middleware pipe functionality.
 This script shows how the pipe transforms OpenWebUI requests to AG-UI format.
 """
 
+import asyncio
 import json
 import uuid
 from pipe import Pipe
@@ -63,6 +64,10 @@ def test_request_transformation():
 
 def test_middleware_flow():
     """Test the complete middleware flow (requires running AG-UI endpoint)"""
+    asyncio.run(_middleware_flow())
+
+async def _middleware_flow():
+    """Send a request through the async pipe and print the streamed response"""
     
     pipe = Pipe()
     
@@ -90,10 +95,10 @@ def test_middleware_flow():
     
     try:
         # This will attempt to connect to the actual AG-UI endpoint
-        response_generator = pipe.pipe(test_request)
+        response_generator = await pipe.pipe(test_request)
         
         print("📨 Response stream:")
-        for chunk in response_generator:
+        async for chunk in response_generator:
             if isinstance(chunk, str):
                 print(chunk, end="", flush=True)
                 
@@ -1,16 +1,20 @@
 """
 Simple math game agent that uses the pydantic-ai library to solve math problems and track the player's progress.
 """
-import json
+import ast
+import operator
+from functools import lru_cache
 from http import HTTPStatus
+from typing import AsyncIterator
 
+import orjson
 from ag_ui.core import RunAgentInput
 from fastapi import FastAPI
 from fastapi.requests import Request
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, ValidationError
 
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import Agent, ModelRetry, RunContext
 from pydantic_ai.ag_ui import SSE_CONTENT_TYPE, StateDeps, run_ag_ui
 from dotenv import load_dotenv
 
@@ -45,10 +49,67 @@ agent = Agent(
     deps_type=StateDeps[GameState]
 )
 
+# AST nodes allowed in a math expression: numbers and arithmetic operators
+_MATH_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub,
+)
+_MATH_BINOPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_MATH_UNARYOPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+# Upper bound on the size of an integer power, in bits, so 9**9**9 can't hang the server
+_MAX_POW_BITS = 4096
+# Longer expressions are rejected before parsing; very deep ones exhaust the parser
+_MAX_MATH_LENGTH = 1000
+
+@lru_cache(maxsize=256)
+def _parse_math(expression: str) -> ast.expr:
+    """Validate an arithmetic expression and parse it once"""
+    if len(expression) > _MAX_MATH_LENGTH:
+        raise ValueError(f"Expression is longer than {_MAX_MATH_LENGTH} characters")
+    tree = ast.parse(expression, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, _MATH_NODES):
+            raise ValueError(f"Unsupported element in expression: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and (
+            isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+        ):
+            raise ValueError(f"Unsupported constant in expression: {node.value!r}")
+    return tree.body
+
+def _eval_math(node: ast.expr) -> float:
+    """Evaluate a validated math expression, refusing huge integer powers and complex results"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        return _MATH_UNARYOPS[type(node.op)](_eval_math(node.operand))
+    left = _eval_math(node.left)
+    right = _eval_math(node.right)
+    if (
+        isinstance(node.op, ast.Pow)
+        and isinstance(left, int)
+        and isinstance(right, int)
+        and abs(left) > 1
+        and abs(left).bit_length() * right > _MAX_POW_BITS
+    ):
+        raise ValueError(f"Result of {left}**{right} is too large")
+    result = _MATH_BINOPS[type(node.op)](left, right)
+    if isinstance(result, complex):
+        # Only a negative base to a fractional power gets here, e.g. (-8)**(1/3)
+        raise ValueError(f"Result of {left}**{right} is not a real number")
+    return result
+
 @agent.tool_plain
 def math(expression: str) -> float:
     """Solve a math problem"""
-    return eval(expression)
+    try:
+        return _eval_math(_parse_math(expression))
+    except (SyntaxError, ValueError, ArithmeticError, RecursionError, MemoryError) as e:
+        raise ModelRetry(f"Invalid math expression {expression!r}: {e}")
 
 @agent.tool
 def get_game_state(ctx: RunContext[StateDeps[GameState]]) -> dict:
@@ -92,23 +153,24 @@ def reset_game(ctx: RunContext[StateDeps[GameState]]) -> str:
     
     return f"Game reset! Your best streak of {old_best} is still saved. Let's play again, {state.player_name}!"
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 
 @app.post('/')
 async def run_agent(request: Request) -> Response:
     """Run the agent"""
     accept = request.headers.get('accept', SSE_CONTENT_TYPE)
+    body = await request.body()
     try:
-        data = await request.json()
-    except Exception as e:
+        data = orjson.loads(body) if body else {}
+    except orjson.JSONDecodeError:
         data = {}
     try:
         run_input = RunAgentInput.model_validate(data)
     except ValidationError as e:  # pragma: no cover
-        return Response(
-            content=json.dumps(e.json()),
-            media_type='application/json',
+        # ctx may hold exception instances orjson can't encode; msg already describes them
+        return ORJSONResponse(
+            e.errors(include_url=False, include_context=False),
             status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
         )
 
@@ -125,6 +187,8 @@ async def run_agent(request: Request) -> Response:
     
     deps = StateDeps(game_state)
     
-    event_stream = run_ag_ui(agent, run_input, deps=deps, accept=accept)
+    # run_ag_ui is an async generator, so StreamingResponse consumes it on the
+    # event loop instead of offloading iteration to the thread pool
+    event_stream: AsyncIterator[str] = run_ag_ui(agent, run_input, deps=deps, accept=accept)
 
     return StreamingResponse(event_stream, media_type=accept)
\ No newline at end of file
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the math tool's expression evaluator, which replaces eval()
+"""
+
+import os
+
+# The agent's OpenAI client needs a key at import time; these tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from pydantic_ai import ModelRetry
+from main import math
+
+
+def _assert_retry(expression: str):
+    """The expression must be refused with ModelRetry instead of evaluated"""
+    try:
+        result = math(expression)
+    except ModelRetry:
+        return
+    raise AssertionError(f"{expression!r} was evaluated to {result!r}")
+
+
+def test_allowed_arithmetic():
+    """Numbers and arithmetic operators evaluate like Python"""
+    assert math("15 + 27") == 42
+    assert math("2 * (3 - 1) / 4") == 1.0
+    assert math("7 // 2") == 3
+    assert math("7 % 3") == 1
+    assert math("-(2 ** 10)") == -1024
+    assert math("2 ** -2") == 0.25
+    assert math("+1.5") == 1.5
+
+
+def test_rejected_elements():
+    """Names, calls, attributes, strings and bools are refused"""
+    for expression in (
+        "x + 1",
+        "__import__('os').system('true')",
+        "(1).real",
+        "'a' * 3",
+        "True + 1",
+        "[1, 2]",
+        "1 if 2 else 3",
+        "1 +",
+    ):
+        _assert_retry(expression)
+
+
+def test_bounded_powers():
+    """Integer powers too large to compute are refused, not evaluated"""
+    _assert_retry("9 ** 9 ** 9")
+    _assert_retry("(2 ** 2000) ** 4")
+    assert math("2 ** 64") == 18446744073709551616
+
+
+def test_arithmetic_errors():
+    """Division by zero, overflow and complex results ask the model to retry"""
+    _assert_retry("1 / 0")
+    _assert_retry("5 % 0")
+    _assert_retry("10.0 ** 400")
+    _assert_retry("(-8) ** (1 / 3)")
+
+
+def test_oversized_expressions():
+    """Very long or deeply nested expressions are refused before parsing"""
+    _assert_retry("-" * 20000 + "1")
+    _assert_retry("+".join(["1"] * 1000))
+
+
+if __name__ == "__main__":
+    test_allowed_arithmetic()
+    test_rejected_elements()
+    test_bounded_powers()
+    test_arithmetic_errors()
+    test_oversized_expressions()
+    print("✅ Math tool tests passed!")